@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of ORM `create_many` against `create_many_bulk` on aiosqlite.
+
+Inserts the same generated rows with the ORM unit of work (`create_many`) and
+with Core executemany (`create_many_bulk`) at several batch sizes, and prints
+rows/sec for each.
+
+Example:
+    $ python bulk_insert_benchmark.py
+
+Author: Mike Ryan
+Date: 2026/10/19
+License: MIT
+"""
+import asyncio
+import secrets
+import time
+
+from dsg_lib.async_database_functions import (
+    async_database,
+    base_schema,
+    database_config,
+)
+from loguru import logger
+from sqlalchemy import Column, String, delete
+
+from database_extensions import ExtendedDatabaseOperations
+
+logger.remove()
+
+row_counts: list = [1000, 10000, 50000]
+batch_sizes: list = [100, 1000, 5000]
+
+db_config = database_config.DBConfig(
+    {'database_uri': 'sqlite+aiosqlite:///:memory:?cache=shared', 'future': True}
+)
+async_db = async_database.AsyncDatabase(db_config)
+db_ops = ExtendedDatabaseOperations(async_db)
+
+
+class BenchUser(base_schema.SchemaBaseSQLite, async_db.Base):
+    __tablename__ = 'bench_users'
+
+    first_name = Column(String(50), index=True)
+    last_name = Column(String(50), index=True)
+    email = Column(String(200), unique=True, index=True)
+
+
+def make_rows(count: int) -> list:
+    rows = []
+    for i in range(count):
+        value = secrets.token_hex(8)
+        rows.append(
+            {
+                'first_name': f'First{value}{i}',
+                'last_name': f'Last{value}{i}',
+                'email': f'user{value}{i}@example.com',
+            }
+        )
+    return rows
+
+
+async def clear_table():
+    async with async_db.get_db_session() as session:
+        await session.execute(delete(BenchUser))
+        await session.commit()
+
+
+async def time_insert(name: str, count: int, insert) -> None:
+    await clear_table()
+    t0 = time.perf_counter()
+    result = await insert()
+    elapsed = time.perf_counter() - t0
+    # db_ops returns the error details instead of raising
+    if isinstance(result, dict) and 'error' in result:
+        raise RuntimeError(f'{name} failed: {result}')
+    print(f'{name:<28} {count:>8} rows {elapsed:>8.3f}s {count / elapsed:>12,.0f} rows/sec')
+
+
+async def main():
+    await async_db.create_tables()
+
+    for count in row_counts:
+        rows = make_rows(count)
+
+        await time_insert(
+            'orm create_many',
+            count,
+            lambda: db_ops.create_many([BenchUser(**row) for row in rows]),
+        )
+        for batch_size in batch_sizes:
+            await time_insert(
+                f'create_many_bulk ({batch_size})',
+                count,
+                lambda: db_ops.create_many_bulk(BenchUser, rows, batch_size=batch_size),
+            )
+        print()
+
+    await async_db.disconnect()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
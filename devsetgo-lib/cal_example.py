@@ -1,11 +1,28 @@
 # -*- coding: utf-8 -*-
 """
+Examples of converting between month numbers and month names.
+
+`calendar_check_number` and `calendar_check_name` call `calendar_functions` one
+value at a time. For bulk conversion (ETL style, millions of rows) use
+`get_months` and `get_month_numbers`, which map a whole list, iterable or NumPy
+array through precomputed lookup tables and report invalid values (0, 13,
+"bob") in a `valid` mask instead of per-item error strings. NumPy is optional;
+NumPy arrays in give NumPy arrays out, anything else gives lists.
+
 Author: Mike Ryan
 Date: 2024/05/16
 License: MIT
 """
+import calendar
+import numbers
+
 from dsg_lib.common_functions import calendar_functions
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
 month_list: list = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13]
 month_names: list = [
     "january",
@@ -23,6 +40,141 @@ month_names: list = [
     "bob",
 ]
 
+MONTHS: tuple = (
+    "January",
+    "February",
+    "March",
+    "April",
+    "May",
+    "June",
+    "July",
+    "August",
+    "September",
+    "October",
+    "November",
+    "December",
+)
+
+
+def build_month_lookup(extra_names: dict = None, min_prefix: int = 3) -> dict:
+    """
+    Build the lookup table used by `get_month_numbers`.
+
+    Keys are lower case. The table holds the English month names, the month
+    names and abbreviations of the current locale (`calendar.month_name` and
+    `calendar.month_abbr`), every unambiguous prefix of at least `min_prefix`
+    characters ("sept", "dec") and any `extra_names`.
+
+    Args:
+        extra_names (dict, optional): Additional names mapped to month numbers,
+            e.g. localized names {"janvier": 1, "März": 3}. Defaults to None.
+        min_prefix (int, optional): Shortest prefix to accept. Defaults to 3.
+
+    Returns:
+        dict: Lower case month name to month number.
+    """
+    names = {}
+    for number, name in enumerate(MONTHS, start=1):
+        names[name.lower()] = number
+    for number in range(1, 13):
+        for name in (calendar.month_name[number], calendar.month_abbr[number]):
+            if name:
+                names[name.lower()] = number
+    for name, number in (extra_names or {}).items():
+        names[name.strip().lower()] = number
+
+    # add prefixes that only match one month
+    prefixes = {}
+    for name, number in names.items():
+        for size in range(min_prefix, len(name)):
+            prefixes.setdefault(name[:size], set()).add(number)
+    lookup = {
+        prefix: numbers.pop()
+        for prefix, numbers in prefixes.items()
+        if len(numbers) == 1
+    }
+    lookup.update(names)
+    return lookup
+
+
+MONTH_LOOKUP: dict = build_month_lookup()
+
+
+def get_months(months):
+    """
+    Convert many month numbers to month names at once.
+
+    Args:
+        months: A list, iterable or NumPy array of month numbers.
+
+    Returns:
+        tuple: (names, valid). `names` has the month name, or None for values
+        that are not a month number between 1 and 12; `valid` is a boolean mask
+        of the same length. Both are NumPy arrays if `months` is one, else lists.
+    """
+    if np is not None and isinstance(months, np.ndarray):
+        if months.dtype.kind in "iuf":
+            table = np.array((None,) + MONTHS, dtype=object)
+            valid = (months >= 1) & (months <= 12) & (months == np.floor(months))
+            index = np.where(valid, months, 0).astype(np.intp)
+            return table[index], valid
+        if months.dtype.kind == "O":
+            # mixed values, e.g. None for missing or pandas Int64 to_numpy(),
+            # are checked one by one
+            names, valid = get_months(months.ravel().tolist())
+            names_array = np.empty(len(names), dtype=object)
+            names_array[:] = names
+            valid_array = np.array(valid, dtype=bool)
+            return names_array.reshape(months.shape), valid_array.reshape(months.shape)
+        return np.full(months.shape, None, dtype=object), np.zeros(months.shape, dtype=bool)
+
+    names = []
+    valid = []
+    for month in months:
+        # numbers.Integral and numbers.Real also cover NumPy and pandas scalars
+        is_month = bool(
+            isinstance(month, numbers.Real)
+            and not isinstance(month, bool)
+            and (isinstance(month, numbers.Integral) or float(month).is_integer())
+            and 1 <= month <= 12
+        )
+        names.append(MONTHS[int(month) - 1] if is_month else None)
+        valid.append(is_month)
+    return names, valid
+
+
+def get_month_numbers(month_names, lookup: dict = MONTH_LOOKUP):
+    """
+    Convert many month names to month numbers at once.
+
+    Matching is case-insensitive, ignores surrounding spaces and accepts the
+    prefixes and localized names in `lookup` (see `build_month_lookup`).
+
+    Args:
+        month_names: A list, iterable or NumPy array of month names.
+        lookup (dict, optional): Lookup table. Defaults to MONTH_LOOKUP.
+
+    Returns:
+        tuple: (numbers, valid). `numbers` has the month number, or -1 for
+        values that are not a month name (as `get_month_number` does); `valid`
+        is a boolean mask of the same length. Both are NumPy arrays if
+        `month_names` is one, else lists.
+    """
+    if np is not None and isinstance(month_names, np.ndarray):
+        # map each distinct value once, then spread the result back out
+        unique, inverse = np.unique(month_names.astype(str), return_inverse=True)
+        mapped = np.array(
+            [lookup.get(name.strip().lower(), -1) for name in unique], dtype=np.int16
+        )
+        numbers = mapped[inverse].reshape(month_names.shape)
+        return numbers, numbers != -1
+
+    numbers = [
+        lookup.get(name.strip().lower(), -1) if isinstance(name, str) else -1
+        for name in month_names
+    ]
+    return numbers, [number != -1 for number in numbers]
+
 
 def calendar_check_number():
     for i in month_list:
@@ -36,6 +188,21 @@ def calendar_check_name():
         print(month)
 
 
+def calendar_check_bulk():
+    names, valid = get_months(month_list)
+    print(names, valid)
+    numbers, valid = get_month_numbers(month_names + ["Sept", " DEC ", "mar"])
+    print(numbers, valid)
+
+    if np is not None:
+        rows = np.random.randint(0, 14, size=1_000_000)
+        names, valid = get_months(rows)
+        print(f"{valid.sum()} of {rows.size} month numbers are valid")
+        numbers, valid = get_month_numbers(names[valid])
+        print(f"{valid.sum()} month names mapped back")
+
+
 if __name__ == "__main__":
     calendar_check_number()
     calendar_check_name()
+    calendar_check_bulk()
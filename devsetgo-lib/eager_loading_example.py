@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Example of loading User.addresses without N+1 queries.
+
+Seeds users with addresses, then lists them three ways and prints the number
+of SQL statements each one ran:
+
+- one query per user for the addresses (N+1, grows with the number of users)
+- `selectinload`, set as the default policy for User (2 statements, plus one
+  per 500 users as the IN list is batched)
+- `joinedload` passed to the call (always 1 statement)
+
+Each listing is checked to return every user with their addresses before its
+statement count is printed.
+
+Example:
+    $ python eager_loading_example.py
+
+Author: Mike Ryan
+Date: 2026/10/19
+License: MIT
+"""
+import asyncio
+import secrets
+
+from dsg_lib.async_database_functions import base_schema, database_config
+from loguru import logger
+from sqlalchemy import Column, ForeignKey, Select, String
+from sqlalchemy.orm import joinedload, relationship, selectinload
+
+from database_extensions import ExtendedDatabaseOperations, InstrumentedAsyncDatabase
+
+logger.remove()
+
+user_counts: list = [10, 100, 1000]
+addresses_per_user: int = 3
+
+db_config = database_config.DBConfig(
+    {'database_uri': 'sqlite+aiosqlite:///:memory:?cache=shared', 'future': True}
+)
+async_db = InstrumentedAsyncDatabase(db_config)
+db_ops = ExtendedDatabaseOperations(async_db)
+
+
+class EagerUser(base_schema.SchemaBaseSQLite, async_db.Base):
+    __tablename__ = 'eager_users'
+
+    first_name = Column(String(50))
+    addresses = relationship('EagerAddress', back_populates='user', lazy='raise')
+
+
+class EagerAddress(base_schema.SchemaBaseSQLite, async_db.Base):
+    __tablename__ = 'eager_addresses'
+
+    street = Column(String(200))
+    user_id = Column(String(36), ForeignKey('eager_users.pkid'))
+    user = relationship('EagerUser', back_populates='addresses', lazy='raise')
+
+
+async def seed(count: int):
+    users = [{'pkid': secrets.token_hex(16), 'first_name': f'First{i}'} for i in range(count)]
+    addresses = [
+        {'street': f'{n} Main St', 'user_id': user['pkid']}
+        for user in users
+        for n in range(addresses_per_user)
+    ]
+    await db_ops.create_many_bulk(EagerUser, users)
+    await db_ops.create_many_bulk(EagerAddress, addresses)
+
+
+async def count_statements(listing) -> tuple:
+    before = db_ops.statement_latency.count
+    result = await listing()
+    return result, db_ops.statement_latency.count - before
+
+
+def check_addresses(name: str, address_lists, count: int):
+    # read_query returns an error dict instead of raising, so check the result
+    # before trusting its statement count
+    if not isinstance(address_lists, list) or len(address_lists) != count:
+        raise RuntimeError(f'{name} did not return {count} users: {address_lists}')
+    for addresses in address_lists:
+        if len(addresses) != addresses_per_user:
+            raise RuntimeError(f'{name} loaded {len(addresses)} addresses for a user')
+
+
+def user_addresses(users):
+    # touching addresses raises if they were not loaded (lazy='raise')
+    if not isinstance(users, list):
+        return users
+    return [user.addresses for user in users]
+
+
+async def n_plus_one():
+    users = await db_ops.read_query(Select(EagerUser), options=[])
+    return [
+        await db_ops.read_query(Select(EagerAddress).where(EagerAddress.user_id == user.pkid))
+        for user in users
+    ]
+
+
+async def main():
+    await async_db.create_tables()
+    db_ops.set_loader_options(EagerUser, selectinload(EagerUser.addresses))
+
+    seeded = 0
+    for count in user_counts:
+        await seed(count - seeded)
+        seeded = count
+
+        address_lists, lazy = await count_statements(n_plus_one)
+        check_addresses('per user queries', address_lists, count)
+        users, selectin = await count_statements(lambda: db_ops.read_query(Select(EagerUser)))
+        check_addresses('selectinload', user_addresses(users), count)
+        users, joined = await count_statements(
+            lambda: db_ops.read_query(
+                Select(EagerUser), options=[joinedload(EagerUser.addresses)]
+            )
+        )
+        check_addresses('joinedload', user_addresses(users), count)
+        print(
+            f'{count:>6} users: per user queries {lazy:>5} statements, '
+            f'selectinload {selectin} statements, joinedload {joined} statements'
+        )
+
+    await async_db.disconnect()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+Extra system health endpoints for the FastAPI example, to be mounted next to
+`dsg_lib.fastapi_functions.system_health_endpoints.create_health_router`.
+
+Like the dsg_lib health router, each endpoint can be enabled or disabled in the
+config dict:
+
+- `/database-pool`: State and metrics of each connection pool of an
+  `InstrumentedAsyncDatabase`. Enabled with `enable_database_pool_endpoint`.
+- `/database-queries`: Per method query timing percentiles from an
+  `ExtendedDatabaseOperations`. Enabled with `enable_database_queries_endpoint`.
+- `/seeding`: Progress of a `seeding.Seeder`, answering 503 until seeding is
+  done so it can be used as a readiness probe. Enabled with
+  `enable_seeding_endpoint`.
+- `/heap-samples`: Top allocation sites and growth deltas from a
+  `heap_profiler.HeapSampler`, sampled in the background instead of on request
+  like `/heapdump`. Enabled with `enable_heap_samples_endpoint`.
+- `/requests`: Per route latency, status counts, requests in flight and
+  sampled profiles from a `request_metrics.RequestMetrics`. Enabled with
+  `enable_requests_endpoint`.
+
+Example:
+```python
+from fastapi import FastAPI
+from health_extensions import create_metrics_router
+
+app = FastAPI()
+
+config = {"enable_database_pool_endpoint": True, "enable_database_queries_endpoint": True}
+app.include_router(
+    create_metrics_router(config=config, async_db=async_db, db_ops=db_ops),
+    prefix="/api/health",
+    tags=["system-health"],
+)
+
+response = client.get("/api/health/database-pool")
+print(response.json())
+# {"writer": {"pool": {"pool_class": "AsyncAdaptedQueuePool", "checkedout": 1, ...}, "events": {...}, "checkout_latency": {...}}}
+```
+
+Author: Mike Ryan
+Date: 2026/10/19
+License: MIT
+"""
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+from loguru import logger
+
+
+def create_metrics_router(
+    config: dict,
+    async_db=None,
+    db_ops=None,
+    seeder=None,
+    heap_sampler=None,
+    request_metrics=None,
+):
+    """
+    Create a router with the configured metrics endpoints.
+
+    Args:
+        config (dict): Each key is the name of an endpoint flag (e.g.
+            `enable_database_pool_endpoint`) and the value whether it is enabled.
+        async_db (InstrumentedAsyncDatabase, optional): Database for the
+            `/database-pool` endpoint. Defaults to None.
+        db_ops (ExtendedDatabaseOperations, optional): Database operations for
+            the `/database-queries` endpoint. Defaults to None.
+        seeder (Seeder, optional): Seeder for the `/seeding` endpoint. Defaults
+            to None.
+        heap_sampler (HeapSampler, optional): Sampler for the `/heap-samples`
+            endpoint. Defaults to None.
+        request_metrics (RequestMetrics, optional): Metrics for the `/requests`
+            endpoint. Defaults to None.
+
+    Returns:
+        APIRouter: A FastAPI router with the configured endpoints.
+    """
+    router = APIRouter()
+
+    if config.get("enable_database_pool_endpoint", True) and async_db is not None:
+
+        @router.get(
+            "/database-pool",
+            status_code=status.HTTP_200_OK,
+        )
+        async def get_database_pool():
+            """
+            Returns the state and metrics of each connection pool.
+
+            Returns:
+                dict: Per pool ("writer", and "read" with a read pool) the pool
+                state (checked out, checked in, overflow), event counters
+                (checkouts, overflow connects, timeouts) and the checkout
+                latency histogram in seconds.
+            """
+            logger.info("Database pool metrics returned")
+            return async_db.pool_metrics()
+
+    if config.get("enable_database_queries_endpoint", True) and db_ops is not None:
+
+        @router.get(
+            "/database-queries",
+            status_code=status.HTTP_200_OK,
+        )
+        async def get_database_queries():
+            """
+            Returns query timing metrics for the database operations.
+
+            Returns:
+                dict: A latency histogram of all SQL statements with the number
+                of slow queries, and per method calls, errors, rows returned and
+                total, SQL and hydration time percentiles in seconds.
+            """
+            logger.info("Database query metrics returned")
+            return db_ops.query_metrics()
+
+    if config.get("enable_seeding_endpoint", True) and seeder is not None:
+
+        @router.get(
+            "/seeding",
+            status_code=status.HTTP_200_OK,
+        )
+        async def get_seeding():
+            """
+            Returns the seeding progress, with status 503 until it is done.
+
+            Returns:
+                dict: The state (idle, running, ready, failed or cancelled),
+                whether the data is ready, records inserted of the total,
+                elapsed seconds and the error if seeding failed.
+            """
+            seeding_status = seeder.status()
+            logger.info(f"Seeding status returned: {seeding_status['state']}")
+            if seeding_status["ready"]:
+                return seeding_status
+            return JSONResponse(
+                seeding_status, status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
+    if config.get("enable_heap_samples_endpoint", True) and heap_sampler is not None:
+
+        @router.get(
+            "/heap-samples",
+            status_code=status.HTTP_200_OK,
+        )
+        async def get_heap_samples():
+            """
+            Returns the stored heap samples, without taking a snapshot.
+
+            Returns:
+                dict: The traced memory now, the recent samples with their top
+                allocation sites and growth since the previous sample, and the
+                growth since the first sample, sizes in bytes.
+            """
+            logger.info("Heap samples returned")
+            return heap_sampler.report()
+
+    if config.get("enable_requests_endpoint", True) and request_metrics is not None:
+
+        @router.get(
+            "/requests",
+            status_code=status.HTTP_200_OK,
+        )
+        async def get_requests():
+            """
+            Returns request timing metrics per route.
+
+            Returns:
+                dict: The number of requests, requests in flight and the peak,
+                per route latency percentiles and buckets in seconds with status
+                code counts, and the top functions of the sampled profiles.
+            """
+            logger.info("Request metrics returned")
+            return request_metrics.to_dict()
+
+    return router
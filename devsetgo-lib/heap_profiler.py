@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+Continuous heap sampling for leak hunting in a running service.
+
+The dsg_lib `/heapdump` endpoint takes a full `tracemalloc` snapshot and groups
+it inside the request, on the event loop. `HeapSampler` instead takes a
+snapshot every `interval` seconds in a daemon thread, groups it by line and
+compares it to the previous sample and to the first one. Each sample keeps only
+the top allocation sites and their growth, only the last `history` samples are
+kept and only two snapshots (the first and the latest), so the memory used by
+the sampler stays bounded. Requests read the stored samples and never wait on a
+snapshot.
+
+tracemalloc traces every allocation, its cost grows with the number of frames
+stored per trace, so the sampler keeps `frames` small (1 by default, the site
+that allocated). Snapshots still hold the GIL while traces are copied; raise
+`interval` on busy workers.
+
+Example:
+```python
+from heap_profiler import HeapSampler
+
+heap_sampler = HeapSampler(interval=60, top=10, history=30)
+heap_sampler.start()
+...
+print(heap_sampler.report())
+# {"tracing": True, "memory_use": {...}, "samples": [{"time": ..., "top": [...], "growth": [...]}], ...}
+heap_sampler.stop()
+```
+
+Author: Mike Ryan
+Date: 2026/10/19
+License: MIT
+"""
+import datetime
+import threading
+import tracemalloc
+from collections import deque
+
+from loguru import logger
+
+# allocations of these modules are left out of the samples
+DEFAULT_EXCLUDE: tuple = (
+    tracemalloc.__file__,
+    "<frozen importlib._bootstrap>",
+    "<frozen importlib._bootstrap_external>",
+    "<unknown>",
+)
+
+
+def _stat_to_dict(stat) -> dict:
+    frame = stat.traceback[0]
+    return {
+        "filename": frame.filename,
+        "lineno": frame.lineno,
+        "size": stat.size,
+        "count": stat.count,
+    }
+
+
+def _diff_to_dict(stat) -> dict:
+    frame = stat.traceback[0]
+    return {
+        "filename": frame.filename,
+        "lineno": frame.lineno,
+        "size": stat.size,
+        "size_diff": stat.size_diff,
+        "count": stat.count,
+        "count_diff": stat.count_diff,
+    }
+
+
+class HeapSampler:
+    """
+    Takes periodic tracemalloc snapshots in a worker thread and keeps the top
+    allocation sites and growth deltas of the last samples.
+
+    Attributes:
+        interval (float): Seconds between samples.
+        frames (int): Frames stored per traced allocation.
+        top (int): Allocation sites kept per sample.
+        samples (deque): The last samples, oldest first.
+    """
+
+    def __init__(
+        self,
+        interval: float = 60,
+        frames: int = 1,
+        top: int = 10,
+        history: int = 30,
+        exclude: tuple = DEFAULT_EXCLUDE,
+    ):
+        """
+        Args:
+            interval (float, optional): Seconds between samples. Defaults to 60.
+            frames (int, optional): Frames stored per traced allocation, used if
+                the sampler starts tracemalloc. Defaults to 1.
+            top (int, optional): Allocation sites kept per sample. Defaults to
+                10.
+            history (int, optional): Number of samples kept. Defaults to 30.
+            exclude (tuple, optional): Filename patterns left out of the
+                samples. Defaults to DEFAULT_EXCLUDE.
+        """
+        self.interval = interval
+        self.frames = frames
+        self.top = top
+        self.samples = deque(maxlen=history)
+        self._filters = [tracemalloc.Filter(False, pattern) for pattern in exclude]
+        self._baseline = None
+        self._previous = None
+        self._growth_since_start = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        """True while the sampling thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start tracemalloc if needed and the sampling thread."""
+        if self.running:
+            return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="heap-sampler", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Heap sampler started, sampling every {self.interval} seconds")
+
+    def stop(self, timeout: float = None):
+        """Stop the sampling thread. tracemalloc keeps tracing."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        logger.info("Heap sampler stopped")
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.sample()
+            except Exception as ex:
+                logger.error(f"Heap sample failed: {ex}")
+            self._stop_event.wait(self.interval)
+
+    def sample(self) -> dict:
+        """
+        Take a snapshot now and store its top sites and growth.
+
+        Returns:
+            dict: The sample, see `report`.
+        """
+        snapshot = tracemalloc.take_snapshot().filter_traces(self._filters)
+        current, peak = tracemalloc.get_traced_memory()
+        top_stats = snapshot.statistics("lineno")[: self.top]
+        growth = self._growth(snapshot, self._previous)
+        growth_since_start = self._growth(snapshot, self._baseline)
+        sample = {
+            "time": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "current": current,
+            "peak": peak,
+            "top": [_stat_to_dict(stat) for stat in top_stats],
+            "growth": growth,
+        }
+        with self._lock:
+            if self._baseline is None:
+                self._baseline = snapshot
+            self._previous = snapshot
+            self._growth_since_start = growth_since_start
+            self.samples.append(sample)
+        return sample
+
+    def _growth(self, snapshot, old_snapshot) -> list:
+        # top allocation sites by growth from old_snapshot to snapshot
+        if old_snapshot is None:
+            return []
+        return [
+            _diff_to_dict(stat)
+            for stat in snapshot.compare_to(old_snapshot, "lineno")[: self.top]
+            if stat.size_diff
+        ]
+
+    def report(self) -> dict:
+        """
+        Return the sampler state and the stored samples.
+
+        Returns:
+            dict: Whether tracing and sampling are on, the traced memory now,
+            the samples (oldest first) with time, current and peak traced bytes,
+            top allocation sites and growth since the previous sample, and the
+            growth since the first sample.
+        """
+        current, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            samples = list(self.samples)
+            growth_since_start = self._growth_since_start
+        return {
+            "tracing": tracemalloc.is_tracing(),
+            "running": self.running,
+            "frames": tracemalloc.get_traceback_limit(),
+            "interval": self.interval,
+            "memory_use": {"current": current, "peak": peak},
+            "samples": samples,
+            "growth_since_start": growth_since_start,
+        }
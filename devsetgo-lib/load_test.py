@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+Load test of the `fastapi_example.py` database endpoints, in process.
+
+Each scenario seeds the database with `dataset_size` users, then runs
+`concurrency` workers that send `requests` requests, picking routes from the
+weighted request `mix`, through httpx `ASGITransport`. There is no server and no
+network, so the numbers compare database backends, settings and code changes on
+one machine rather than predicting production throughput; the client shares the
+event loop with the app.
+
+The report is printed as JSON: per scenario the settings, the overall requests,
+errors (status >= 400 or exceptions), requests per second and p50/p95/p99
+latency in seconds, and the same per route.
+
+Seeding deletes every user and address, so the load test runs on a new
+database file in a temporary directory, removed afterwards, and never on the
+`example.db` of the app. Set `EXAMPLE_DATABASE_URI` to load test another
+database; its users and addresses are replaced.
+
+Paths and JSON bodies may use `{pkid}` (a random seeded user id) and `{token}`
+(a new random hex token). Scenarios can be loaded from a JSON file holding a list
+of scenario dicts; missing keys take the values of `DEFAULT_SCENARIO`.
+
+Example:
+    $ python load_test.py
+    $ python load_test.py my_scenarios.json > results.json
+
+Author: Mike Ryan
+Date: 2026/10/19
+License: MIT
+"""
+import asyncio
+import json
+import os
+import random
+import secrets
+import shutil
+import sys
+import tempfile
+import time
+
+import httpx
+from loguru import logger
+from sqlalchemy import Select, delete
+
+# seed() empties the users table, never run on the database of the app; set
+# before fastapi_example reads it on import
+database_dir = None
+if 'EXAMPLE_DATABASE_URI' not in os.environ:
+    database_dir = tempfile.mkdtemp(prefix='load_test_')
+    os.environ['EXAMPLE_DATABASE_URI'] = (
+        f'sqlite+aiosqlite:///{os.path.join(database_dir, "load_test.db")}'
+    )
+
+import fastapi_example  # noqa: E402
+from metrics import LatencyHistogram  # noqa: E402
+
+DEFAULT_MIX: dict = {
+    'get-count': {'method': 'GET', 'path': '/database/get-count', 'weight': 10},
+    'get-all': {'method': 'GET', 'path': '/database/get-all?limit=100', 'weight': 20},
+    'get-one-record': {
+        'method': 'GET',
+        'path': '/database/get-one-record?record_id={pkid}',
+        'weight': 40,
+    },
+    'get-users-with-addresses': {
+        'method': 'GET',
+        'path': '/database/get-users-with-addresses?limit=100',
+        'weight': 10,
+    },
+    'create-one-record': {
+        'method': 'POST',
+        'path': '/database/create-one-record',
+        'json': {
+            'first_name': 'Load{token}',
+            'last_name': 'Test{token}',
+            'email': 'load{token}@example.com',
+        },
+        'weight': 10,
+    },
+    'update-one-record': {
+        'method': 'PUT',
+        'path': '/database/update-one-record',
+        'json': {
+            'id': '{pkid}',
+            'first_name': 'Updated{token}',
+            'last_name': 'Test{token}',
+            'email': 'updated{token}@example.com',
+        },
+        'weight': 10,
+    },
+}
+
+DEFAULT_SCENARIO: dict = {
+    'name': 'default',
+    'dataset_size': 10000,
+    'concurrency': 10,
+    'requests': 2000,
+    'mix': DEFAULT_MIX,
+    'seed': 42,
+}
+
+scenarios: list = [
+    {'name': 'small dataset', 'dataset_size': 1000},
+    {'name': 'large dataset', 'dataset_size': 50000},
+    {'name': 'high concurrency', 'concurrency': 50},
+    {
+        'name': 'read only',
+        'mix': {
+            name: route
+            for name, route in DEFAULT_MIX.items()
+            if route['method'] == 'GET'
+        },
+    },
+]
+
+
+def fill(template, values: dict):
+    """Format `{pkid}` and `{token}` in the strings of a path or JSON body."""
+    if isinstance(template, str):
+        return template.format(**values)
+    if isinstance(template, dict):
+        return {key: fill(value, values) for key, value in template.items()}
+    if isinstance(template, list):
+        return [fill(value, values) for value in template]
+    return template
+
+
+async def seed(dataset_size: int) -> list:
+    """Replace the users with `dataset_size` new ones and return their ids."""
+    async_db = fastapi_example.async_db
+    db_ops = fastapi_example.db_ops
+    User = fastapi_example.User
+    await async_db.create_tables()
+    async with async_db.get_db_session() as session:
+        await session.execute(delete(fastapi_example.Address))
+        await session.execute(delete(User))
+        await session.commit()
+    db_ops.clear_cache()
+    await fastapi_example.seeder.run(dataset_size)
+    return await db_ops.read_query(Select(User), columns=[User.pkid])
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: dict) -> dict:
+    """
+    Seed the database and send the scenario's requests.
+
+    Args:
+        client (httpx.AsyncClient): Client for the app.
+        scenario (dict): The scenario, see `DEFAULT_SCENARIO`.
+
+    Returns:
+        dict: The scenario settings with overall and per route results.
+    """
+    scenario = {**DEFAULT_SCENARIO, **scenario}
+    pkids = await seed(scenario['dataset_size'])
+    mix = scenario['mix']
+    names = list(mix)
+    weights = [mix[name]['weight'] for name in names]
+    rng = random.Random(scenario['seed'])
+    total_requests = scenario['requests']
+
+    histograms = {name: LatencyHistogram(sample_size=total_requests) for name in names}
+    errors = dict.fromkeys(names, 0)
+    overall = LatencyHistogram(sample_size=total_requests)
+    sent = 0
+
+    async def worker():
+        nonlocal sent
+        while sent < total_requests:
+            sent += 1
+            name = rng.choices(names, weights)[0]
+            route = mix[name]
+            values = {'pkid': rng.choice(pkids), 'token': secrets.token_hex(8)}
+            t0 = time.perf_counter()
+            try:
+                response = await client.request(
+                    route['method'],
+                    fill(route['path'], values),
+                    json=fill(route.get('json'), values),
+                )
+                failed = response.status_code >= 400
+            except Exception as ex:
+                logger.error(f'Request to {name} failed: {ex}')
+                failed = True
+            elapsed = time.perf_counter() - t0
+            histograms[name].observe(elapsed)
+            overall.observe(elapsed)
+            errors[name] += failed
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(scenario['concurrency'])))
+    duration = time.perf_counter() - t0
+
+    def summary(histogram: LatencyHistogram, error_count: int) -> dict:
+        return {
+            'requests': histogram.count,
+            'errors': error_count,
+            'rps': round(histogram.count / duration, 1),
+            'p50': round(histogram.percentile(50), 6),
+            'p95': round(histogram.percentile(95), 6),
+            'p99': round(histogram.percentile(99), 6),
+        }
+
+    return {
+        'name': scenario['name'],
+        'dataset_size': scenario['dataset_size'],
+        'concurrency': scenario['concurrency'],
+        'database_uri': str(fastapi_example.db_config.engine.url),
+        'duration': round(duration, 3),
+        'total': summary(overall, sum(errors.values())),
+        'routes': {
+            name: summary(histograms[name], errors[name])
+            for name in names
+            if histograms[name].count
+        },
+    }
+
+
+async def main(scenario_list: list):
+    transport = httpx.ASGITransport(app=fastapi_example.app)
+    results = []
+    async with httpx.AsyncClient(transport=transport, base_url='http://load-test') as client:
+        for scenario in scenario_list:
+            results.append(await run_scenario(client, scenario))
+    await fastapi_example.async_db.disconnect()
+    read_engine = getattr(fastapi_example.db_config, 'read_engine', None)
+    if read_engine is not None:
+        await read_engine.dispose()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        with open(sys.argv[1]) as scenario_file:
+            scenarios = json.load(scenario_file)
+    try:
+        asyncio.run(main(scenarios))
+    finally:
+        if database_dir is not None:
+            shutil.rmtree(database_dir, ignore_errors=True)
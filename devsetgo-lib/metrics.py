@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Small in-process metrics helpers shared by the FastAPI example extensions.
+
+`LatencyHistogram` counts observations in fixed, cumulative buckets (like a
+Prometheus histogram) and keeps a bounded window of recent samples to report
+percentiles. It is cheap enough to call on every request or query.
+
+Example:
+```python
+from metrics import LatencyHistogram
+
+histogram = LatencyHistogram()
+histogram.observe(0.012)
+print(histogram.to_dict())
+# {"count": 1, "sum": 0.012, "mean": 0.012, "max": 0.012, "p50": 0.012, ...}
+```
+
+Author: Mike Ryan
+Date: 2026/10/19
+License: MIT
+"""
+import math
+from collections import deque
+
+# bucket upper bounds in seconds
+DEFAULT_BUCKETS: tuple = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class LatencyHistogram:
+    """
+    A latency histogram with fixed buckets and percentiles of recent samples.
+
+    Attributes:
+        buckets (tuple): Bucket upper bounds in seconds, an implicit +Inf bucket
+            is added.
+        count (int): Number of observations.
+        total (float): Sum of all observations in seconds.
+        max (float): Largest observation in seconds.
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS, sample_size: int = 1000):
+        """
+        Args:
+            buckets (tuple, optional): Bucket upper bounds in seconds. Defaults
+                to DEFAULT_BUCKETS.
+            sample_size (int, optional): Number of recent samples kept for
+                percentiles. Defaults to 1000.
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.samples = deque(maxlen=sample_size)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        """Record one observation in seconds."""
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.samples.append(seconds)
+        for index, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.bucket_counts[index] += 1
+                return
+        self.bucket_counts[-1] += 1
+
+    def percentile(self, percent: float) -> float:
+        """Return the `percent` (0-100) percentile of the recent samples."""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = max(0, math.ceil(percent / 100 * len(ordered)) - 1)
+        return ordered[index]
+
+    def to_dict(self) -> dict:
+        """Return the histogram as a JSON friendly dict, times in seconds."""
+        cumulative = 0
+        buckets = {}
+        for bound, bucket_count in zip(self.buckets + ("+Inf",), self.bucket_counts):
+            cumulative += bucket_count
+            buckets[f"le_{bound}"] = cumulative
+        return {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "mean": round(self.total / self.count, 6) if self.count else 0.0,
+            "max": round(self.max, 6),
+            "p50": round(self.percentile(50), 6),
+            "p95": round(self.percentile(95), 6),
+            "p99": round(self.percentile(99), 6),
+            "buckets": buckets,
+        }
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+Per request timing and sampled profiling middleware for Starlette and FastAPI.
+
+`RequestMetricsMiddleware` is a plain ASGI middleware (no `BaseHTTPMiddleware`
+task and stream overhead) that records into a shared `RequestMetrics`:
+
+- a latency histogram, request count and status counts per route, keyed by
+  method and route template (`GET /database/get-one-record`), so path parameters
+  do not create new keys. The template includes the prefix of included routers
+  and mounted apps. Requests that match no route are counted under
+  `unmatched`.
+- the number of requests in flight and the peak.
+- with `profile_every=N`, a cProfile profile of one request in N. The profile
+  covers the whole event loop while that request runs, so concurrent requests
+  show up in it too. The top functions by cumulative time are kept for the
+  last `profile_history` profiles. Framework and driver frames dominate that
+  list, so `profile_paths` can limit it to the app's own files, which leaves the
+  handlers and `db_ops` methods.
+
+Serve `RequestMetrics.to_dict()` from an endpoint, e.g. `/requests` of
+`health_extensions.create_metrics_router`.
+
+Example:
+```python
+from fastapi import FastAPI
+from starlette.middleware import Middleware
+from request_metrics import RequestMetrics, RequestMetricsMiddleware
+
+request_metrics = RequestMetrics(profile_every=100, profile_paths=("/srv/app",))
+app = FastAPI(middleware=[Middleware(RequestMetricsMiddleware, metrics=request_metrics)])
+
+print(request_metrics.to_dict())
+# {"in_flight": 0, "peak_in_flight": 4, "routes": {"GET /database/get-all": {"count": 10, "p50": ...}}, "profiles": [...]}
+```
+
+Author: Mike Ryan
+Date: 2026/10/19
+License: MIT
+"""
+import datetime
+import time
+from collections import deque
+
+from loguru import logger
+
+from metrics import LatencyHistogram
+
+
+class RequestMetrics:
+    """
+    Request latency, status and in-flight counts per route, and sampled
+    profiles.
+
+    Attributes:
+        in_flight (int): Requests being handled now.
+        peak_in_flight (int): Most requests handled at once.
+        routes (dict): Route key to its LatencyHistogram.
+        statuses (dict): Route key to a dict of status code counts.
+        profiles (deque): The last sampled profiles, oldest first.
+    """
+
+    def __init__(
+        self,
+        profile_every: int = 0,
+        profile_top: int = 20,
+        profile_history: int = 10,
+        profile_paths: tuple = None,
+    ):
+        """
+        Args:
+            profile_every (int, optional): Profile one request in this many, 0
+                turns profiling off. Defaults to 0.
+            profile_top (int, optional): Functions kept per profile. Defaults to
+                20.
+            profile_history (int, optional): Profiles kept. Defaults to 10.
+            profile_paths (tuple, optional): Only keep functions from files
+                under these paths in profiles. Defaults to None, all functions.
+        """
+        self.profile_every = profile_every
+        self.profile_top = profile_top
+        self.profile_paths = tuple(profile_paths) if profile_paths else None
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.routes = {}
+        self.statuses = {}
+        self.profiles = deque(maxlen=profile_history)
+        self._profiling = False
+
+    def should_profile(self) -> bool:
+        """True if the current request is sampled and no profile is running."""
+        return (
+            self.profile_every > 0
+            and not self._profiling
+            and self.requests % self.profile_every == 0
+        )
+
+    def observe(self, key: str, status_code: int, seconds: float):
+        """Record one finished request."""
+        histogram = self.routes.get(key)
+        if histogram is None:
+            histogram = self.routes[key] = LatencyHistogram()
+            self.statuses[key] = {}
+        histogram.observe(seconds)
+        statuses = self.statuses[key]
+        statuses[status_code] = statuses.get(status_code, 0) + 1
+
+    def add_profile(self, key: str, seconds: float, profiler):
+        """Store the top functions of a cProfile.Profile of a request."""
+        # imported on first use, most requests are not profiled
+        import pstats
+
+        stats = pstats.Stats(profiler).sort_stats(pstats.SortKey.CUMULATIVE)
+        functions = []
+        for func in stats.fcn_list:
+            if len(functions) >= self.profile_top:
+                break
+            filename, lineno, name = func
+            if self.profile_paths and not filename.startswith(self.profile_paths):
+                continue
+            calls, total_calls, tottime, cumtime, _ = stats.stats[func]
+            functions.append(
+                {
+                    "function": f"{filename}:{lineno}({name})",
+                    "calls": total_calls,
+                    "tottime": round(tottime, 6),
+                    "cumtime": round(cumtime, 6),
+                }
+            )
+        self.profiles.append(
+            {
+                "time": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                "route": key,
+                "seconds": round(seconds, 6),
+                "functions": functions,
+            }
+        )
+
+    def to_dict(self) -> dict:
+        """Return the metrics as a JSON friendly dict, times in seconds."""
+        return {
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "routes": {
+                key: {
+                    **histogram.to_dict(),
+                    "statuses": {
+                        str(code): count for code, count in self.statuses[key].items()
+                    },
+                }
+                for key, histogram in self.routes.items()
+            },
+            "profiles": list(self.profiles),
+        }
+
+
+def route_prefix(scope: dict, route) -> str:
+    """
+    Return the part of the request path in front of the matched route.
+
+    `route.path` is relative to the router or app it is in, so routes of
+    routers included with a prefix or of mounted apps lack that prefix. The
+    route matched the end of the request path, what comes before is the prefix.
+    """
+    path_regex = getattr(route, "path_regex", None)
+    if path_regex is None:
+        return ""
+    path = scope["path"]
+    start = 0
+    while start != -1:
+        if path_regex.match(path[start:]):
+            return path[:start]
+        start = path.find("/", start + 1)
+    return ""
+
+
+def route_key(scope: dict) -> str:
+    """Return `METHOD /prefix/route/template` for a handled request scope."""
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path is None:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        path = getattr(endpoint, "__name__", str(endpoint))
+    else:
+        path = route_prefix(scope, route) + path
+    return f"{scope['method']} {path}"
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware recording every HTTP request into a `RequestMetrics`."""
+
+    def __init__(self, app, metrics: RequestMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        profiler = None
+        if metrics.should_profile():
+            import cProfile
+
+            metrics._profiling = True
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError as ex:
+                # another profiler is active on this thread
+                logger.warning(f"Request profile skipped: {ex}")
+                metrics._profiling = False
+                profiler = None
+        metrics.requests += 1
+        metrics.in_flight += 1
+        if metrics.in_flight > metrics.peak_in_flight:
+            metrics.peak_in_flight = metrics.in_flight
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            elapsed = time.perf_counter() - t0
+            metrics.in_flight -= 1
+            key = route_key(scope)
+            metrics.observe(key, status_code, elapsed)
+            if profiler is not None:
+                try:
+                    metrics.add_profile(key, elapsed, profiler)
+                except Exception as ex:
+                    logger.error(f"Request profile failed: {ex}")
+                finally:
+                    metrics._profiling = False
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of response serialization for large record lists.
+
+Serves the same generated user rows from three endpoints of an in-process
+FastAPI app and prints the median request latency and response size for each
+record count:
+
+- `default`: returns `{"records": rows}`, serialized by FastAPI through
+  `jsonable_encoder` and `json.dumps`.
+- `records`: returns `RecordsResponse({"records": rows})`, orjson straight to
+  bytes.
+- `columnar`: returns `RecordsResponse(to_columns(rows))`.
+
+Requests go through httpx `ASGITransport`, so there is no network in the
+timings.
+
+Example:
+    $ python response_benchmark.py
+
+Author: Mike Ryan
+Date: 2026/10/19
+License: MIT
+"""
+import asyncio
+import datetime
+import secrets
+import statistics
+import time
+import uuid
+
+import httpx
+from fastapi import FastAPI
+
+from fast_responses import RecordsResponse, to_columns
+
+record_counts: list = [100, 1000, 10000, 100000]
+repeats: int = 5
+
+app = FastAPI()
+rows: list = []
+
+
+@app.get('/default')
+async def default():
+    return {'records': rows}
+
+
+@app.get('/records')
+async def records():
+    return RecordsResponse({'records': rows})
+
+
+@app.get('/columnar')
+async def columnar():
+    return RecordsResponse(to_columns(rows))
+
+
+def make_rows(count: int) -> list:
+    now = datetime.datetime.now()
+    made = []
+    for i in range(count):
+        value = secrets.token_hex(8)
+        made.append(
+            {
+                'pkid': str(uuid.uuid4()),
+                'date_created': now,
+                'date_updated': now,
+                'first_name': f'First{value}{i}',
+                'last_name': f'Last{value}{i}',
+                'email': f'user{value}{i}@example.com',
+            }
+        )
+    return made
+
+
+async def time_endpoint(client: httpx.AsyncClient, path: str, count: int) -> None:
+    timings = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        response = await client.get(path)
+        timings.append(time.perf_counter() - t0)
+    size = len(response.content) / 1024
+    median = statistics.median(timings)
+    print(f'{path:<10} {count:>8} records {median:>8.4f}s {size:>10,.0f} KiB')
+
+
+async def main():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        for count in record_counts:
+            rows[:] = make_rows(count)
+            for path in ('/default', '/records', '/columnar'):
+                await time_endpoint(client, path, count)
+            print()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
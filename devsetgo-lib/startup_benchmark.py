@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Startup time benchmark and budget check for `fastapi_example.py`.
+
+Each run starts a fresh interpreter, so nothing is cached in `sys.modules`:
+
+- `python -X importtime -c "import fastapi_example"` gives the import time and
+  the slowest top level imports.
+- a second interpreter imports the app and times `lifespan` up to the point
+  the app accepts traffic.
+
+Both run in a temporary directory with `EXAMPLE_DATABASE_URI` pointing at a
+database file in it, so the benchmark never creates or seeds the app's
+`example.db` or writes its `log/` directory. Each run gets a new directory,
+removed afterwards.
+
+The medians of `runs` runs are printed as JSON and compared to
+`IMPORT_BUDGET` and `LIFESPAN_BUDGET`. The script exits with status 1 if either
+is over budget, so it can run as a CI step to catch startup regressions.
+
+Example:
+    $ python startup_benchmark.py
+    $ python startup_benchmark.py 10  # number of runs
+
+Author: Mike Ryan
+Date: 2026/10/19
+License: MIT
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# seconds, medians over the runs
+IMPORT_BUDGET: float = 1.0
+LIFESPAN_BUDGET: float = 0.1
+
+runs: int = 5
+top_imports: int = 10
+
+app_dir = Path(__file__).resolve().parent
+
+lifespan_code = """
+import asyncio, json, time
+t0 = time.perf_counter()
+import fastapi_example
+t1 = time.perf_counter()
+
+async def main():
+    t2 = time.perf_counter()
+    async with fastapi_example.lifespan(fastapi_example.app):
+        t3 = time.perf_counter()
+    print(json.dumps({"import": t1 - t0, "lifespan": t3 - t2}))
+
+asyncio.run(main())
+"""
+
+
+def run_python(*args, work_dir: str) -> subprocess.CompletedProcess:
+    # the app is imported from app_dir, its database and logs go to work_dir
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(filter(None, [str(app_dir), os.environ.get("PYTHONPATH")])),
+        "EXAMPLE_DATABASE_URI": f"sqlite+aiosqlite:///{Path(work_dir) / 'startup_benchmark.db'}",
+    }
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=work_dir,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def parse_importtime(stderr: str) -> dict:
+    """
+    Parse `-X importtime` output.
+
+    Returns:
+        dict: Cumulative seconds of `fastapi_example` ("total") and of each top
+        level import it triggered ("modules").
+    """
+    total = 0.0
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # the header line
+        seconds = int(cumulative) / 1_000_000
+        if name.strip() == "fastapi_example":
+            total = seconds
+        elif name.startswith("   ") and not name.startswith("    "):
+            # top level imports are indented by one level
+            modules[name.strip()] = seconds
+    return {"total": total, "modules": modules}
+
+
+def main(run_count: int = runs) -> int:
+    import_times = []
+    module_times = {}
+    lifespan_times = []
+    for _ in range(run_count):
+        # a new database each run, every lifespan creates the tables
+        with tempfile.TemporaryDirectory(prefix="startup_benchmark_") as work_dir:
+            result = parse_importtime(
+                run_python(
+                    "-X", "importtime", "-c", "import fastapi_example", work_dir=work_dir
+                ).stderr
+            )
+            import_times.append(result["total"])
+            for name, seconds in result["modules"].items():
+                module_times.setdefault(name, []).append(seconds)
+            output = run_python("-c", lifespan_code, work_dir=work_dir).stdout
+            timings = json.loads(output.splitlines()[-1])
+            lifespan_times.append(timings["lifespan"])
+
+    import_median = statistics.median(import_times)
+    lifespan_median = statistics.median(lifespan_times)
+    slowest = sorted(
+        ((statistics.median(times), name) for name, times in module_times.items()),
+        reverse=True,
+    )[:top_imports]
+    report = {
+        "runs": run_count,
+        "import": round(import_median, 4),
+        "import_budget": IMPORT_BUDGET,
+        "lifespan": round(lifespan_median, 4),
+        "lifespan_budget": LIFESPAN_BUDGET,
+        "slowest_imports": {name: round(seconds, 4) for seconds, name in slowest},
+        "over_budget": import_median > IMPORT_BUDGET
+        or lifespan_median > LIFESPAN_BUDGET,
+    }
+    print(json.dumps(report, indent=2))
+    return 1 if report["over_budget"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else runs))
@@ -2,9 +2,18 @@
 """
 This module is used to validate a list of email addresses using various configurations.
 
-The module imports the `validate_email_address` function from the `dsg_lib.common_functions.email_validation`
-module and uses it to validate a list of email addresses. The email addresses and configurations are hard-coded
-into the module.
+The module validates each email address in two phases. The syntax phase parses the address once with
+the most permissive `email_validator` options and caches the result by email, so the same address is not
+re-parsed for every configuration. The policy phase is cheap and runs per configuration: it checks the
+cached parse against the configuration's `allow_*` options, re-checks the domain for
+`test_environment`/`globally_deliverable` (also cached) and, if requested, checks deliverability via DNS.
+An address that fails the policy is parsed again with the configuration's own options (cached), so the
+error message is the one `email_validator` gives.
+The DNS resolver is pluggable: any object with a dnspython style `resolve(qname, rdtype)` method can be
+passed as `dns_resolver`. `OfflineResolver` answers from a zone file in-process, with configurable latency
+and failures, so throughput can be benchmarked without network access. Set `USE_OFFLINE_RESOLVER` to
+False to use real DNS.
+The results have the same shape as `dsg_lib.common_functions.email_validation.validate_email_address`.
 
 The module measures the time taken to validate all the email addresses with all the configurations and prints
 the results in a sorted order.
@@ -28,8 +37,13 @@ Attributes:
         - globally_deliverable (bool): Whether the email address should be globally deliverable.
         - timeout (int): The timeout for the validation in seconds.
         - dns_type (str): The type of DNS to use for the validation. Can be 'dns' or 'timeout'.
+    ZONE_FILE (str): The zone file used by `OfflineResolver`.
+
+Classes:
+    OfflineResolver: An in-process DNS resolver stand-in that answers from a zone file.
 
 Functions:
+    parse_email_syntax(email: str) -> tuple: Parses the email address once and caches the result.
     validate_email_address(email: str, **kwargs: dict) -> dict: Validates an email address using the provided
     configuration and returns a dictionary with the results.
 
@@ -37,10 +51,347 @@ Author: Mike Ryan
 Date: 2024/05/16
 License: MIT
 """
-from dsg_lib.common_functions.email_validation import validate_email_address
-
+import copy
 import pprint
+import random
 import time
+from collections import namedtuple
+from functools import lru_cache
+
+from email_validator import (
+    GLOBALLY_DELIVERABLE,
+    EmailNotValidError,
+    EmailSyntaxError,
+    EmailUndeliverableError,
+    caching_resolver,
+    validate_email,
+)
+from email_validator.syntax import validate_email_domain_name
+
+USE_OFFLINE_RESOLVER = True
+ZONE_FILE = "test_files/example_zone.txt"
+
+# options that relax the syntax check, used for the single cached parse
+PERMISSIVE_SYNTAX = {
+    "allow_smtputf8": True,
+    "allow_empty_local": True,
+    "allow_quoted_local": True,
+    "allow_display_name": True,
+    "allow_domain_literal": True,
+    "test_environment": True,
+    "globally_deliverable": False,
+    "check_deliverability": False,
+}
+
+
+MXRecord = namedtuple("MXRecord", ["preference", "exchange"])
+AddressRecord = namedtuple("AddressRecord", ["address"])
+TXTRecord = namedtuple("TXTRecord", ["strings"])
+
+
+class OfflineResolver:
+    """
+    An in-process DNS resolver stand-in for deterministic deliverability checks.
+
+    Answers `resolve(qname, rdtype)` from a zone file instead of the network, raising
+    the same dnspython exceptions a real resolver would. Each line of the zone file is
+    `<domain> <type> <value>`, where type is MX, A, AAAA or TXT, or one of:
+        - LATENCY <seconds>: extra latency for every query to the domain.
+        - TIMEOUT: every query to the domain times out.
+        - NONAMESERVERS: every query to the domain fails with NoNameservers.
+
+    Domains not in the zone return NXDOMAIN and listed domains without a record of the
+    queried type return NoAnswer. Unicode domains in the zone file are IDNA encoded,
+    like the queries.
+
+    Args:
+        zone_file (str): Path to the zone file.
+        latency (float, optional): Latency in seconds added to every query. Defaults to 0.
+        failure_rate (float, optional): Fraction of queries that time out at random. Defaults to 0.
+        seed (int, optional): Seed for the random failures, for repeatable runs. Defaults to None.
+
+    Attributes:
+        queries (int): The number of queries answered so far.
+    """
+
+    def __init__(self, zone_file: str, latency: float = 0, failure_rate: float = 0, seed: int = None):
+        self.zone_file = zone_file
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.queries = 0
+        self._random = random.Random(seed)
+        self.records = {}
+        self.domain_latency = {}
+        self.domain_failure = {}
+        self.load_zone(zone_file)
+
+    def __repr__(self):
+        return f"<OfflineResolver {self.zone_file}>"
+
+    def load_zone(self, zone_file: str):
+        import dns.name
+
+        with open(zone_file, encoding="utf-8") as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                if not line:
+                    continue
+                domain, rdtype, *value = line.split()
+                # queries arrive IDNA encoded, encode Unicode domains the same way
+                domain = dns.name.from_text(domain).to_text(omit_final_dot=True).lower()
+                rdtype = rdtype.upper()
+                types = self.records.setdefault(domain, {})
+
+                if rdtype == "LATENCY":
+                    self.domain_latency[domain] = float(value[0])
+                elif rdtype in ("TIMEOUT", "NONAMESERVERS"):
+                    self.domain_failure[domain] = rdtype
+                elif rdtype == "MX":
+                    types.setdefault(rdtype, []).append(MXRecord(int(value[0]), value[1]))
+                elif rdtype in ("A", "AAAA"):
+                    types.setdefault(rdtype, []).append(AddressRecord(value[0]))
+                elif rdtype == "TXT":
+                    types.setdefault(rdtype, []).append(TXTRecord((" ".join(value).encode(),)))
+                else:
+                    raise ValueError(f"Unsupported record type {rdtype} in {zone_file}")
+
+    def resolve(self, qname: str, rdtype: str) -> list:
+        import dns.exception
+        import dns.resolver
+
+        self.queries += 1
+        domain = str(qname).lower().rstrip(".")
+
+        delay = self.latency + self.domain_latency.get(domain, 0)
+        if delay:
+            time.sleep(delay)
+
+        failure = self.domain_failure.get(domain)
+        if failure == "TIMEOUT" or (
+            self.failure_rate and self._random.random() < self.failure_rate
+        ):
+            raise dns.exception.Timeout
+        if failure == "NONAMESERVERS":
+            raise dns.resolver.NoNameservers
+
+        if domain not in self.records:
+            raise dns.resolver.NXDOMAIN
+        answer = self.records[domain].get(rdtype.upper())
+        if not answer:
+            raise dns.resolver.NoAnswer
+        return answer
+
+
+@lru_cache(maxsize=4096)
+def parse_email_syntax(email: str) -> tuple:
+    """
+    Parse the email address with the most permissive options.
+
+    The result is cached by email, so each address is parsed once no matter how
+    many configurations it is validated against.
+
+    Returns:
+        tuple: (ValidatedEmail, None) if the syntax is valid, else (None, EmailNotValidError).
+    """
+    try:
+        return validate_email(email, **PERMISSIVE_SYNTAX), None
+    except EmailNotValidError as e:
+        return None, e
+
+
+@lru_cache(maxsize=1024)
+def _check_domain(ascii_domain: str, test_environment: bool, globally_deliverable: bool):
+    # special-use and dotless domains depend on these two options only
+    try:
+        validate_email_domain_name(
+            ascii_domain,
+            test_environment=test_environment,
+            globally_deliverable=globally_deliverable,
+        )
+    except EmailSyntaxError as e:
+        return e
+    return None
+
+
+@lru_cache(maxsize=32)
+def _dns_resolver(timeout: int):
+    # one caching resolver per timeout, so DNS answers are reused across calls
+    return caching_resolver(timeout=timeout)
+
+
+def _violates_policy(emailinfo, parameters: dict) -> bool:
+    # cheap per-configuration checks on top of the cached parse
+    if emailinfo.smtputf8 and not parameters["allow_smtputf8"]:
+        return True
+    if emailinfo.local_part == "" and not parameters["allow_empty_local"]:
+        return True
+    if emailinfo.original.startswith('"') and not parameters["allow_quoted_local"]:
+        return True
+    if getattr(emailinfo, "domain_address", None) is not None:
+        if not parameters["allow_domain_literal"]:
+            return True
+    elif _check_domain(
+        emailinfo.ascii_domain,
+        parameters["test_environment"],
+        parameters["globally_deliverable"],
+    ):
+        return True
+    return emailinfo.display_name is not None and not parameters["allow_display_name"]
+
+
+@lru_cache(maxsize=4096)
+def _policy_error(
+    email: str,
+    allow_smtputf8: bool,
+    allow_empty_local: bool,
+    allow_quoted_local: bool,
+    allow_display_name: bool,
+    allow_domain_literal: bool,
+    test_environment: bool,
+    globally_deliverable: bool,
+):
+    # the address breaks the configuration: parse it again with those options
+    # so the error has email_validator's own message
+    try:
+        validate_email(
+            email,
+            allow_smtputf8=allow_smtputf8,
+            allow_empty_local=allow_empty_local,
+            allow_quoted_local=allow_quoted_local,
+            allow_display_name=allow_display_name,
+            allow_domain_literal=allow_domain_literal,
+            test_environment=test_environment,
+            globally_deliverable=globally_deliverable,
+            check_deliverability=False,
+        )
+    except EmailNotValidError as e:
+        return e
+    return None
+
+
+def _check_policy(email: str, emailinfo, parameters: dict):
+    # a failed permissive parse also gets the configured error message, e.g.
+    # "x@localhost" reads differently with and without globally_deliverable
+    if emailinfo is not None and not _violates_policy(emailinfo, parameters):
+        return
+    error = _policy_error(
+        email,
+        parameters["allow_smtputf8"],
+        parameters["allow_empty_local"],
+        parameters["allow_quoted_local"],
+        parameters["allow_display_name"],
+        parameters["allow_domain_literal"],
+        parameters["test_environment"],
+        parameters["globally_deliverable"],
+    )
+    if error is not None:
+        raise error
+
+
+def validate_email_address(
+    email: str,
+    check_deliverability: bool = True,
+    test_environment: bool = False,
+    allow_smtputf8: bool = False,
+    allow_empty_local: bool = False,
+    allow_quoted_local: bool = False,
+    allow_display_name: bool = False,
+    allow_domain_literal: bool = False,
+    globally_deliverable: bool = None,
+    timeout: int = 10,
+    dns_type: str = "dns",
+    dns_resolver=None,
+) -> dict:
+    """
+    Validate an email address against one configuration.
+
+    Takes the same arguments as `dsg_lib`'s `validate_email_address`. The syntax parse
+    comes from `parse_email_syntax` (cached), then the configuration's policy checks
+    and the optional deliverability check are applied.
+
+    If `dns_resolver` is given (any object with a dnspython style `resolve(qname, rdtype)`
+    method, such as `OfflineResolver`) it is used for the deliverability check instead of
+    the resolver selected by `dns_type` and `timeout`.
+
+    Returns:
+        dict: The validation result with `email`, `valid` and `parameters`, plus
+        `email_data` when valid or `error` and `error_type` when not.
+
+    Raises:
+        ValueError: If `dns_type` is not 'dns' or 'timeout'.
+    """
+    dns_type = dns_type.lower()
+    if dns_type not in ("dns", "timeout"):
+        raise ValueError(
+            "dns_type must be either 'dns' or 'timeout'. Default is 'dns' if not provided or input is None."
+        )
+    if globally_deliverable is None:
+        globally_deliverable = GLOBALLY_DELIVERABLE
+
+    parameters = {
+        "allow_display_name": allow_display_name,
+        "allow_domain_literal": allow_domain_literal,
+        "allow_empty_local": allow_empty_local,
+        "allow_quoted_local": allow_quoted_local,
+        "allow_smtputf8": allow_smtputf8,
+        "check_deliverability": check_deliverability,
+        "dns_resolver": dns_resolver,
+        "dns_type": dns_type,
+        "globally_deliverable": globally_deliverable,
+        "test_environment": test_environment,
+        "timeout": timeout,
+    }
+
+    try:
+        emailinfo, error = parse_email_syntax(email)
+        _check_policy(email, emailinfo, parameters)
+        if error is not None:
+            raise error
+
+        is_domain_literal = getattr(emailinfo, "domain_address", None) is not None
+        if check_deliverability and not test_environment and not is_domain_literal:
+            # copy so the cached parse is never modified
+            emailinfo = copy.copy(emailinfo)
+            if dns_resolver is not None:
+                dns_param = {"dns_resolver": dns_resolver}
+            elif dns_type == "dns":
+                dns_param = {"dns_resolver": _dns_resolver(timeout)}
+            else:
+                if timeout is None or timeout <= 0 or isinstance(timeout, int) is False:
+                    timeout = 5
+                dns_param = {"timeout": timeout}
+
+            # imported here as dns.resolver is slow to import
+            from email_validator.deliverability import validate_email_deliverability
+
+            deliverability_info = validate_email_deliverability(
+                emailinfo.ascii_domain, emailinfo.domain, **dns_param
+            )
+            if deliverability_info.get("mx") is not None:
+                emailinfo.mx = deliverability_info["mx"]
+            emailinfo.mx_fallback_type = deliverability_info.get("mx_fallback_type")
+
+        return {
+            "email": emailinfo.normalized,
+            "valid": not check_deliverability or getattr(emailinfo, "mx", None) is not None,
+            "email_data": dict(sorted(vars(emailinfo).items())),
+            "parameters": parameters,
+        }
+
+    except EmailUndeliverableError as e:
+        error_type = "EmailUndeliverableError"
+        error = e
+    except EmailNotValidError as e:
+        error_type = "EmailNotValidError"
+        error = e
+
+    return {
+        "valid": False,
+        "email": email,
+        "error": str(error),
+        "error_type": error_type,
+        "parameters": parameters,
+    }
 
 
 if __name__ == "__main__":
@@ -115,13 +466,16 @@ if __name__ == "__main__":
         {"check_deliverability": False, "test_environment": True, "allow_smtputf8": True, "allow_empty_local": False, "allow_quoted_local": False, "allow_display_name": True, "allow_domain_literal": True, "globally_deliverable": None, "timeout": 45, "dns_type": 'timeout'},
     ]
 
+    # answer DNS from the zone file, so the timing does not depend on the network
+    resolver = OfflineResolver(ZONE_FILE) if USE_OFFLINE_RESOLVER else None
+
     t0 = time.time()
     validity=[]
 
     for email in email_addresses:
         for config in configurations:
 
-            res = validate_email_address(email, **config)
+            res = validate_email_address(email, dns_resolver=resolver, **config)
             validity.append(res)
     t1 = time.time()
     validity = sorted(validity, key=lambda x: x['email'])
@@ -130,3 +484,5 @@ if __name__ == "__main__":
             pprint.pprint(v, indent=4)
 
     print(f"Time taken: {t1 - t0:.2f}")
+    if resolver is not None:
+        print(f"DNS queries: {resolver.queries}")
@@ -1,13 +1,22 @@
+import cProfile
+import io
 import logging
+import math
+import pstats
+import time
+from collections import deque
 from pathlib import Path
 
 from loguru import logger
 from starlette.applications import Starlette
+from starlette.middleware import Middleware
 from starlette.responses import JSONResponse
 from starlette.routing import Route
 
 # set log level [DEBUG, INFO, WARNING, ERROR, CRITICAL]
 LOGURU_LOGGING_LEVEL = "DEBUG"
+# profile 1 in N requests with cProfile, 0 to turn off
+PROFILE_EVERY = 100
 
 def config_log():
     
@@ -51,6 +60,79 @@ def config_log():
 def start_up():
     config_log()
 
+
+# request timing, shared by the middleware and the /metrics route
+request_metrics = {
+    "requests": 0,
+    "in_flight": 0,
+    "peak_in_flight": 0,
+    # per route: last 1000 latencies for percentiles, and the request count
+    "routes": {},
+    "route_counts": {},
+    "profiles": deque(maxlen=10),
+    # one profile at a time, cProfile allows one active profiler per thread
+    "profiling": False,
+}
+
+
+class TimingMiddleware:
+    # plain ASGI middleware recording latency per route, requests in flight and
+    # a cProfile of 1 in PROFILE_EVERY requests
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profiler = None
+        if (
+            PROFILE_EVERY
+            and not request_metrics["profiling"]
+            and request_metrics["requests"] % PROFILE_EVERY == 0
+        ):
+            request_metrics["profiling"] = True
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError as ex:
+                # another profiler is active on this thread
+                logger.warning(f"Request profile skipped: {ex}")
+                request_metrics["profiling"] = False
+                profiler = None
+        request_metrics["requests"] += 1
+        request_metrics["in_flight"] += 1
+        request_metrics["peak_in_flight"] = max(
+            request_metrics["peak_in_flight"], request_metrics["in_flight"]
+        )
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            elapsed = time.perf_counter() - t0
+            request_metrics["in_flight"] -= 1
+            # route template, not the raw path, so path parameters share a key
+            route = getattr(scope.get("route"), "path", "unmatched")
+            key = f"{scope['method']} {route}"
+            # last 1000 latencies per route for percentiles
+            request_metrics["routes"].setdefault(key, deque(maxlen=1000)).append(elapsed)
+            route_counts = request_metrics["route_counts"]
+            route_counts[key] = route_counts.get(key, 0) + 1
+            if profiler is not None:
+                profiler.disable()
+                try:
+                    stream = io.StringIO()
+                    pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(15)
+                    request_metrics["profiles"].append({"route": key, "stats": stream.getvalue()})
+                finally:
+                    request_metrics["profiling"] = False
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
 async def index_route(request):
     logging.debug("logging")
     logger.debug("logger")
@@ -65,9 +147,31 @@ async def index_route(request):
 
     return JSONResponse({"status": "UP"})
 
+
+async def metrics_route(request):
+    routes = {
+        key: {
+            "count": request_metrics["route_counts"][key],
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+        }
+        for key, latencies in request_metrics["routes"].items()
+    }
+    return JSONResponse(
+        {
+            "requests": request_metrics["requests"],
+            "in_flight": request_metrics["in_flight"],
+            "peak_in_flight": request_metrics["peak_in_flight"],
+            "routes": routes,
+            "profiles": list(request_metrics["profiles"]),
+        }
+    )
+
 app = Starlette(on_startup=[start_up],routes=[
     Route('/', index_route),
-])
+    Route('/metrics', metrics_route),
+], middleware=[Middleware(TimingMiddleware)])
 
 
 if __name__ == "__main__":